@@ -4,32 +4,48 @@
 
 from __future__ import print_function
 
-import inspect
 import logging
 import os
 import random
 import shutil
-import tensorwatch as tw
 import torch
 import torchvision.datasets as datasets
-import torchvision.transforms as transforms
 from argparse import ArgumentParser
 from pprint import pformat
-from progress.bar import Bar
 from tempfile import NamedTemporaryFile
-from time import time
-from torch.utils.data import DataLoader
+from time import monotonic_ns
+from torch.utils.data import DataLoader, Dataset
+from torch.utils.data.distributed import DistributedSampler
 
 import models.cifar as models
-from utils import AverageMeter, Scribe, calculate_accuracy
+from utils import AverageMeter, DataPrefetcher, Scribe
 
+# explicit registry: the old inspect.getmembers sweep dragged submodules
+# into the dict (and therefore into the --arch choices) and paid for
+# reflection on every attribute of the package at import time
 MODEL_ARCHS = {
-    name: value
-    for name, value in inspect.getmembers(models)
-    if inspect.isfunction(value) or inspect.ismodule(value)
+    "alexnet": models.alexnet,
+    "densenet": models.densenet,
+    "preresnet": models.preresnet,
+    "resnet": models.resnet,
+    "resnext": models.resnext,
+    "vgg11": models.vgg11,
+    "vgg11_bn": models.vgg11_bn,
+    "vgg13": models.vgg13,
+    "vgg13_bn": models.vgg13_bn,
+    "vgg16": models.vgg16,
+    "vgg16_bn": models.vgg16_bn,
+    "vgg19": models.vgg19,
+    "vgg19_bn": models.vgg19_bn,
+    "wrn": models.wrn,
 }
 USE_CUDA = torch.cuda.is_available()
 
+# https://github.com/kuangliu/pytorch-cifar/issues/19#issue-268972488
+CIFAR_MEAN = (0.4914, 0.4822, 0.4465)
+CIFAR_STD = (0.2023, 0.1994, 0.2010)
+_NORM_STATS = {}  # per-device (1,3,1,1) mean/std tensors
+
 
 def main(**args):
     t_logfile = NamedTemporaryFile(mode="w+", suffix=".log")
@@ -41,7 +57,19 @@ def main(**args):
     logging.info("Execution options: %s", pformat(args))
 
     # Preliminary Setup
-    if USE_CUDA:
+    # distributed training is opted into by launching under torchrun
+    # (torchrun --nproc_per_node=N cifar.py ...), which provides the
+    # rendezvous env vars; plain python3 invocations stay single-process
+    distributed = USE_CUDA and "LOCAL_RANK" in os.environ
+    if distributed:
+        logging.info("• CUDA is enabled (distributed)")
+        torch.distributed.init_process_group("nccl")
+        local_rank = int(os.environ["LOCAL_RANK"])
+        # torchrun assigns devices through LOCAL_RANK; masking
+        # CUDA_VISIBLE_DEVICES here would break every rank but 0
+        torch.cuda.set_device(local_rank)
+        logging.info("%s", torch.cuda.get_device_name(local_rank))
+    elif USE_CUDA:
         os.environ["CUDA_VISIBLE_DEVICES"] = args["gpu_id"]
         logging.info("• CUDA is enabled")
         for device_id in args["gpu_id"].split():
@@ -57,6 +85,9 @@ def main(**args):
     torch.manual_seed(seed)
     if USE_CUDA:
         torch.cuda.manual_seed_all(seed)
+        # CIFAR shapes are fixed (32x32), so cuDNN's autotuner converges
+        # after a few iterations; enable it before the first forward
+        torch.backends.cudnn.benchmark = True
     if not os.path.isdir(args["checkpoint"]):
         os.makedirs(args["checkpoint"], exist_ok=True)
 
@@ -64,9 +95,9 @@ def main(**args):
     logging.info("• Preparing '%(dataset)s' dataset", args)
     num_classes, trainloader, testloader = initialize_dataloaders(
         args["dataset"],
-        workers=args["workers"],
         train_batch=args["train_batch"],
         test_batch=args["test_batch"],
+        distributed=distributed,
     )
 
     # Model & Architecture
@@ -75,10 +106,23 @@ def main(**args):
     model = initialize_model(arch, num_classes, **args)
     logging.info("%s", model)
 
-    model = torch.nn.DataParallel(model)
     if USE_CUDA:
-        model = model.cuda()
-        torch.backends.cudnn.benchmark = True
+        # NHWC lets cuDNN use its fastest tensor-core conv kernels under
+        # AMP without internal layout transposes
+        model = model.cuda().to(memory_format=torch.channels_last)
+    # Inductor fuses elementwise epilogues into the conv kernels and
+    # removes per-op Python dispatch; input shapes are fixed at 32x32 so
+    # shape specialization is safe. Skipped when manual graph capture
+    # (run_epoch_pass / the profile branch) would conflict with
+    # Inductor's own graph machinery.
+    if not (args["cuda_graph"] or args["mode"] == "profile"):
+        model = torch.compile(model, mode="reduce-overhead", fullgraph=False)
+    if distributed:
+        # NCCL all-reduce on gradients scales much better than
+        # DataParallel's per-step scatter/gather through the GIL
+        model = torch.nn.parallel.DistributedDataParallel(
+            model, device_ids=[local_rank]
+        )
 
     num_params = sum([p.numel() for p in model.parameters()])
     num_learnable = sum([p.numel() for p in model.parameters() if p.requires_grad])
@@ -88,21 +132,23 @@ def main(**args):
         {"params": num_params, "learnable": num_learnable},
     )
 
-    criterion = torch.nn.CrossEntropyLoss()
+    # summed loss feeds the on-device epoch accumulator exactly (no
+    # re-weighting of short final batches); backward divides by the
+    # batch size so gradients keep their usual per-sample scale
+    criterion = torch.nn.CrossEntropyLoss(reduction="sum")
     optimizer = torch.optim.SGD(
         model.parameters(),
         lr=args["lr"],
         momentum=args["momentum"],
         weight_decay=args["weight_decay"],
     )
-
-    # Tensorwatch Initialization
-    w = tw.Watcher(filename=args["tensorwatch_log"])
-    loss_stream = w.create_stream(name="train_loss")
-    acc_stream = w.create_stream(name="train_acc")
-    test_loss_stream = w.create_stream(name="test_loss")
-    test_acc_stream = w.create_stream(name="test_acc")
-    lr_stream = w.create_stream(name="lr")
+    # mixed precision: FP16 conv/GEMM under autocast with FP32 master
+    # weights, made safe by dynamic loss scaling
+    scaler = torch.cuda.amp.GradScaler(enabled=USE_CUDA)
+    # the captured train graph and its static buffers outlive any one
+    # epoch; re-capturing per epoch would re-run warmup steps on every
+    # epoch's first batch and pay the capture cost hundreds of times
+    graph_cache = {}
 
     if args["mode"] == "evaluate":
         logging.info("Only evaluation")
@@ -114,28 +160,46 @@ def main(**args):
         )
 
     elif args["mode"] == "train":
+        # only rank 0 writes progress, tensorwatch streams, plots, and
+        # checkpoints; concurrent ranks would clobber the same paths
+        is_writer = not distributed or torch.distributed.get_rank() == 0
+        if is_writer:
+            # tensorwatch drags pandas and friends in at import time,
+            # adding seconds of cold start; only train mode pays for it
+            import tensorwatch as tw
+
+            w = tw.Watcher(filename=args["tensorwatch_log"])
+            loss_stream = w.create_stream(name="train_loss")
+            acc_stream = w.create_stream(name="train_acc")
+            test_loss_stream = w.create_stream(name="test_loss")
+            test_acc_stream = w.create_stream(name="test_acc")
+            lr_stream = w.create_stream(name="lr")
+
+            scribe = Scribe(
+                os.path.join(args["checkpoint"], "progress.txt"),
+                title=args["dataset"] + "-" + arch,
+            )
+            scribe.set_names(
+                [
+                    "Learning Rate",
+                    "Train Loss",
+                    "Valid Loss",
+                    "Train Acc.",
+                    "Valid Acc.",
+                ]
+            )
+
         best_acc = 0
         start_epoch = args["start_epoch"]
-        title = args["dataset"] + "-" + arch
-
-        scribe = Scribe(
-            os.path.join(args["checkpoint"], "progress.txt"), title=title
-        )
-        scribe.set_names(
-            [
-                "Learning Rate",
-                "Train Loss",
-                "Valid Loss",
-                "Train Acc.",
-                "Valid Acc.",
-            ]
-        )
 
         lr = args["lr"]
         interrupted = False
         for epoch in range(start_epoch, args["epochs"]):
             train_loss, train_acc, test_loss, test_acc = 0, -1, 0, -1
             try:
+                if distributed:
+                    # reshuffle the distributed shards each epoch
+                    trainloader.sampler.set_epoch(epoch)
                 lr = update_learning_rate(
                     lr, args["schedule"], args["gamma"], optimizer, epoch
                 )
@@ -143,57 +207,67 @@ def main(**args):
                     "Epoch %(cur_epoch)d/%(epochs)d | LR: %(lr)f",
                     {"cur_epoch": epoch + 1, "epochs": args["epochs"], "lr": lr},
                 )
-                train_loss, train_acc = train(trainloader, model, criterion, optimizer)
+                train_loss, train_acc = train(
+                    trainloader,
+                    model,
+                    criterion,
+                    optimizer,
+                    scaler,
+                    graphed=args["cuda_graph"],
+                    graph_cache=graph_cache,
+                )
                 with torch.no_grad():
                     test_loss, test_acc = test(testloader, model, criterion)
             except KeyboardInterrupt:
                 logging.warning("Caught Keyboard Interrupt at epoch %d", epoch + 1)
                 interrupted = True
             finally:
-                # append model progress
-                scribe.append((lr, train_loss, test_loss, train_acc, test_acc))
-                loss_stream.write((epoch, train_loss))
-                acc_stream.write((epoch, train_acc))
-                test_loss_stream.write((epoch, test_loss))
-                test_acc_stream.write((epoch, test_acc))
-                lr_stream.write((epoch, lr))
-
-                # save the model
                 is_best = test_acc > best_acc
                 best_acc = max(test_acc, best_acc)
-                save_checkpoint(
-                    {
-                        "epoch": epoch + 1,
-                        "state_dict": model.state_dict(),
-                        "acc": test_acc,
-                        "best_acc": best_acc,
-                        "optimizer": optimizer.state_dict(),
-                    },
-                    is_best,
-                    checkpoint=args["checkpoint"],
-                )
+                if is_writer:
+                    # append model progress
+                    scribe.append((lr, train_loss, test_loss, train_acc, test_acc))
+                    loss_stream.write((epoch, train_loss))
+                    acc_stream.write((epoch, train_acc))
+                    test_loss_stream.write((epoch, test_loss))
+                    test_acc_stream.write((epoch, test_acc))
+                    lr_stream.write((epoch, lr))
+
+                    # save the model
+                    save_checkpoint(
+                        {
+                            "epoch": epoch + 1,
+                            "state_dict": unwrapped_state_dict(model),
+                            "acc": test_acc,
+                            "best_acc": best_acc,
+                            "optimizer": optimizer.state_dict(),
+                        },
+                        is_best,
+                        epoch + 1,
+                        checkpoint=args["checkpoint"],
+                    )
             if interrupted:
                 break
 
-        scribe.close()
-        scribe.plot(
-            plot_title="Training Accuracy Progress",
-            names=["Train Acc.", "Valid Acc."],
-            xlabel="Epoch",
-            ylabel="Accuracy",
-        )
-        scribe.savefig(os.path.join(args["checkpoint"], "progress_acc.eps"))
-        scribe.plot(
-            plot_title="Training Loss Progress",
-            names=["Train Loss", "Valid Loss"],
-            xlabel="Epoch",
-            ylabel="Cross Entropy Loss",
-        )
-        scribe.savefig(os.path.join(args["checkpoint"], "progress_loss.eps"))
+        if is_writer:
+            scribe.close()
+            scribe.plot(
+                plot_title="Training Accuracy Progress",
+                names=["Train Acc.", "Valid Acc."],
+                xlabel="Epoch",
+                ylabel="Accuracy",
+            )
+            scribe.savefig(os.path.join(args["checkpoint"], "progress_acc.eps"))
+            scribe.plot(
+                plot_title="Training Loss Progress",
+                names=["Train Loss", "Valid Loss"],
+                xlabel="Epoch",
+                ylabel="Cross Entropy Loss",
+            )
+            scribe.savefig(os.path.join(args["checkpoint"], "progress_loss.eps"))
+            shutil.copy(t_logfile.name, args["checkpoint"])
         logging.info("Best evaluation accuracy: %f", best_acc)
         logging.info("Results saved to %s", args["checkpoint"])
-
-        shutil.copy(t_logfile.name, args["checkpoint"])
         t_logfile.close()
 
     elif args["mode"] == "profile":
@@ -201,30 +275,69 @@ def main(**args):
         for (inputs, _) in testloader:
             break
         logging.info("Input Size: %s", inputs.size())
+        if USE_CUDA:
+            inputs = inputs.cuda()
+        inputs = batch_transform(inputs)
         with torch.no_grad():
             if USE_CUDA:
-                with torch.cuda.profiler.profile() as prof:
-                    # warmup the CUDA memory allocator and profiler
-                    # model(inputs)
-                    with torch.autograd.profiler.emit_nvtx(enabled=USE_CUDA):
-                        model(inputs)
+                # a single cold forward measures allocator growth and
+                # cuDNN autotuning, not the model; warm up to steady
+                # state, then capture the forward into a graph and
+                # replay it so only kernel cost remains
+                for _ in range(10):
+                    model(inputs)
+                torch.cuda.synchronize()
+
+                graph = torch.cuda.CUDAGraph()
+                static_in = inputs.clone()
+                with torch.cuda.graph(graph):
+                    model(static_in)
+
+                replays = 100
+                # unlike the per-step DEBUG timing, these events feed
+                # the INFO summary below and are always needed
+                ev_start = torch.cuda.Event(enable_timing=True)
+                ev_end = torch.cuda.Event(enable_timing=True)
+                with torch.cuda.profiler.profile():
+                    with torch.autograd.profiler.emit_nvtx():
+                        ev_start.record()
+                        for _ in range(replays):
+                            graph.replay()
+                        ev_end.record()
+                torch.cuda.synchronize()
+                logging.info(
+                    "Forward pass: %.3f ms/iter (graph replay, %d iters)",
+                    ev_start.elapsed_time(ev_end) / replays,
+                    replays,
+                )
             else:
-                with torch.autograd.profiler.profile(use_cuda=USE_CUDA) as prof:
+                with torch.autograd.profiler.profile() as prof:
                     model(inputs)
-            logging.info(prof)
+                logging.info(prof)
 
 
-def initialize_dataloaders(dataset, workers=0, train_batch=1, test_batch=1):
-    base_transforms = [
-        transforms.ToTensor(),
-        # https://github.com/kuangliu/pytorch-cifar/issues/19#issue-268972488
-        transforms.Normalize((0.4914, 0.4822, 0.4465), (0.2023, 0.1994, 0.2010)),
-    ]
-    train_transforms = transforms.Compose(
-        [transforms.RandomCrop(32, padding=4), transforms.RandomHorizontalFlip()]
-        + base_transforms
-    )
-    test_transforms = transforms.Compose(base_transforms)
+class CIFARTensorDataset(Dataset):
+    """CIFAR held fully in RAM as one uint8 (N, 3, 32, 32) tensor.
+
+    torchvision's CIFAR routes every 32x32 sample through PIL and
+    per-sample transforms in ``__getitem__``; for data this small the
+    Python overhead dominates loading. Slicing a preconverted tensor
+    makes ``__getitem__`` a pure indexing op (normalization and
+    augmentation stay batched on the GPU in batch_transform).
+    """
+
+    def __init__(self, base):
+        self.data = torch.from_numpy(base.data).permute(0, 3, 1, 2).contiguous()
+        self.targets = torch.as_tensor(base.targets)
+
+    def __len__(self):
+        return self.data.size(0)
+
+    def __getitem__(self, idx):
+        return self.data[idx], self.targets[idx]
+
+
+def initialize_dataloaders(dataset, train_batch=1, test_batch=1, distributed=False):
     if dataset == "cifar10":
         data_class = datasets.CIFAR10
         num_classes = 10
@@ -234,132 +347,359 @@ def initialize_dataloaders(dataset, workers=0, train_batch=1, test_batch=1):
     else:
         assert False, f"Unsupported dataset: {dataset}"
 
-    trainset = data_class(
-        root="./data", train=True, download=True, transform=train_transforms
-    )
+    # the whole dataset is ~180 MB, so keep it resident; with no decode
+    # or I/O per sample, worker processes would only add IPC overhead
+    trainset = CIFARTensorDataset(data_class(root="./data", train=True, download=True))
+    train_sampler = DistributedSampler(trainset) if distributed else None
     trainloader = DataLoader(
-        trainset, batch_size=train_batch, shuffle=True, num_workers=workers
-    )
-    testset = data_class(
-        root="./data", train=False, download=False, transform=test_transforms
+        trainset,
+        batch_size=train_batch,
+        shuffle=(train_sampler is None),
+        sampler=train_sampler,
+        pin_memory=USE_CUDA,
     )
+    testset = CIFARTensorDataset(data_class(root="./data", train=False, download=False))
     testloader = DataLoader(
-        testset, batch_size=test_batch, shuffle=False, num_workers=workers
+        testset, batch_size=test_batch, shuffle=False, pin_memory=USE_CUDA
     )
     return num_classes, trainloader, testloader
 
 
-def initialize_model(
-    architecture,
-    num_classes,
-    cardinality=None,
-    depth=None,
-    widen_factor=None,
-    drop=None,
-    growth_rate=None,
-    compression_rate=None,
-    block_name=None,
-    **kwargs,
-):
-    if architecture == "resnext":
-        model = MODEL_ARCHS[architecture](
-            cardinality=cardinality,
-            num_classes=num_classes,
-            depth=depth,
-            widen_factor=widen_factor,
-            dropRate=drop,
-        )
-    elif architecture == "densenet":
-        model = MODEL_ARCHS[architecture](
-            num_classes=num_classes,
-            depth=depth,
-            growthRate=growth_rate,
-            compressionRate=compression_rate,
-            dropRate=drop,
-        )
-    elif architecture == "wrn":
-        model = MODEL_ARCHS[architecture](
-            num_classes=num_classes,
-            depth=depth,
-            widen_factor=widen_factor,
-            dropRate=drop,
-        )
-    elif architecture.endswith("resnet"):  # resnet & preresnet
-        model = MODEL_ARCHS[architecture](
-            num_classes=num_classes, depth=depth, block_name=block_name
-        )
-    else:  # alexnet, vgg*
-        model = MODEL_ARCHS[architecture](num_classes=num_classes)
-    return model
+# adapters picking out (and renaming) the CLI options each architecture
+# understands; anything not listed here takes only num_classes
+ARCH_ADAPTERS = {
+    "resnext": lambda ctor, num_classes, args: ctor(
+        cardinality=args["cardinality"],
+        num_classes=num_classes,
+        depth=args["depth"],
+        widen_factor=args["widen_factor"],
+        dropRate=args["drop"],
+    ),
+    "densenet": lambda ctor, num_classes, args: ctor(
+        num_classes=num_classes,
+        depth=args["depth"],
+        growthRate=args["growth_rate"],
+        compressionRate=args["compressionRate"],
+        dropRate=args["drop"],
+    ),
+    "wrn": lambda ctor, num_classes, args: ctor(
+        num_classes=num_classes,
+        depth=args["depth"],
+        widen_factor=args["widen_factor"],
+        dropRate=args["drop"],
+    ),
+    "resnet": lambda ctor, num_classes, args: ctor(
+        num_classes=num_classes, depth=args["depth"], block_name=args["block_name"]
+    ),
+}
+ARCH_ADAPTERS["preresnet"] = ARCH_ADAPTERS["resnet"]
 
 
-def train(trainloader, model, criterion, optimizer):
-    return run_epoch_pass("Train", trainloader, model, criterion, optimizer)
+def _default_arch(ctor, num_classes, args):  # alexnet, vgg*
+    return ctor(num_classes=num_classes)
+
+
+def initialize_model(architecture, num_classes, **args):
+    adapter = ARCH_ADAPTERS.get(architecture, _default_arch)
+    return adapter(MODEL_ARCHS[architecture], num_classes, args)
+
+
+def batch_transform(inputs, train=False):
+    """Batched, on-device equivalent of the old per-sample torchvision
+    pipeline: uint8 -> float, normalize, and (for training) a padded
+    random crop plus per-sample horizontal flips.
+    """
+    device = inputs.device
+    if device not in _NORM_STATS:
+        _NORM_STATS[device] = (
+            torch.tensor(CIFAR_MEAN, device=device).view(1, 3, 1, 1),
+            torch.tensor(CIFAR_STD, device=device).view(1, 3, 1, 1),
+        )
+    mean, std = _NORM_STATS[device]
+
+    inputs = inputs.float().div_(255.0)
+    if train:
+        # RandomCrop(32, padding=4) with an independent offset per
+        # sample, gathered in one batched advanced-indexing op
+        n = inputs.size(0)
+        padded = torch.nn.functional.pad(inputs, (4, 4, 4, 4))
+        offsets_i = torch.randint(0, 9, (n,), device=device)
+        offsets_j = torch.randint(0, 9, (n,), device=device)
+        window = torch.arange(32, device=device)
+        batch = torch.arange(n, device=device).view(n, 1, 1, 1)
+        chan = torch.arange(3, device=device).view(1, 3, 1, 1)
+        rows = (offsets_i.view(n, 1, 1, 1) + window.view(1, 1, 32, 1))
+        cols = (offsets_j.view(n, 1, 1, 1) + window.view(1, 1, 1, 32))
+        inputs = padded[batch, chan, rows, cols]
+        # RandomHorizontalFlip, an independent coin per sample
+        flip_mask = torch.rand(n, 1, 1, 1, device=device) < 0.5
+        inputs = torch.where(flip_mask, inputs.flip(-1), inputs)
+    inputs = inputs.sub_(mean).div_(std)
+    if inputs.is_cuda:
+        # match the model's channels_last layout (see main)
+        inputs = inputs.contiguous(memory_format=torch.channels_last)
+    return inputs
+
+
+def train(
+    trainloader, model, criterion, optimizer, scaler, graphed=False, graph_cache=None
+):
+    return run_epoch_pass(
+        "Train",
+        trainloader,
+        model,
+        criterion,
+        optimizer,
+        scaler,
+        graphed=graphed,
+        graph_cache=graph_cache,
+    )
 
 
 def test(testloader, model, criterion):
-    return run_epoch_pass("Test", testloader, model, criterion, None)
+    return run_epoch_pass("Test", testloader, model, criterion, None, None)
+
 
+def capture_train_graph(model, criterion, optimizer, scaler, inputs, targets):
+    """Capture one AMP forward+backward into a replayable CUDA graph.
 
-def run_epoch_pass(mode, dataloader, model, criterion, optimizer):
+    Warmup iterations run in a side stream so cuDNN autotuning and
+    allocator pool growth happen outside the capture. ``scaler.step`` /
+    ``scaler.update`` inspect host-side scalars and must stay outside the
+    graph; the caller copies each batch into the returned static tensors,
+    replays, then steps. Input shapes must stay constant across replays.
+    """
+    static = {"inputs": inputs.clone(), "targets": targets.clone()}
+
+    side = torch.cuda.Stream()
+    side.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(side):
+        for _ in range(3):
+            optimizer.zero_grad(set_to_none=True)
+            with torch.cuda.amp.autocast():
+                outputs = model(static["inputs"])
+                loss = criterion(outputs, static["targets"])
+            scaler.scale(loss / static["inputs"].size(0)).backward()
+            scaler.step(optimizer)
+            scaler.update()
+    torch.cuda.current_stream().wait_stream(side)
+
+    optimizer.zero_grad(set_to_none=True)
+    graph = torch.cuda.CUDAGraph()
+    with torch.cuda.graph(graph):
+        with torch.cuda.amp.autocast():
+            static["outputs"] = model(static["inputs"])
+            static["loss"] = criterion(static["outputs"], static["targets"])
+        scaler.scale(static["loss"] / static["inputs"].size(0)).backward()
+    return graph, static
+
+
+class EpochStats(object):
+    """On-device loss/accuracy accumulators for one epoch pass.
+
+    Sums stay on the GPU; reading them back every iteration would force
+    a stream sync per batch, so they only reach the host via sync() at
+    progress refreshes and at epoch end.
+    """
+
+    def __init__(self):
+        device = "cuda" if USE_CUDA else "cpu"
+        self.loss_sum = torch.zeros((), device=device)
+        self.correct1_sum = torch.zeros((), device=device)
+        self.correct5_sum = torch.zeros((), device=device)
+        self.n_seen = 0
+        self.avg_loss, self.avg_top1, self.avg_top5 = 0.0, 0.0, 0.0
+
+    def accumulate(self, outputs, targets, loss, batch_size):
+        # argmax for top-1 and a 5-element topk membership test are far
+        # cheaper than the full sort calculate_accuracy used to do
+        preds = outputs.detach()
+        _, top5_idx = preds.topk(5, dim=1)
+        self.loss_sum += loss.detach()
+        self.correct1_sum += preds.argmax(1).eq(targets).sum()
+        self.correct5_sum += top5_idx.eq(targets.unsqueeze(1)).any(1).sum()
+        self.n_seen += batch_size
+
+    def sync(self):
+        self.avg_loss = self.loss_sum.item() / self.n_seen
+        self.avg_top1 = 100.0 * self.correct1_sum.item() / self.n_seen
+        self.avg_top5 = 100.0 * self.correct5_sum.item() / self.n_seen
+
+
+def run_epoch_pass(
+    mode,
+    dataloader,
+    model,
+    criterion,
+    optimizer,
+    scaler,
+    graphed=False,
+    graph_cache=None,
+):
     """Perform one train or test pass through the data (epoch)
+
+    The per-batch work lives in _train_loop/_test_loop, each specialized
+    so the hot loop carries no mode branches or repeated len() lookups.
     """
-    batch_time = AverageMeter("Batch Time")
-    data_time = AverageMeter("Data Time")
-    losses = AverageMeter("Losses")
-    top1 = AverageMeter("Top 1 Accuracy")
-    top5 = AverageMeter("Top 5 Accuracy")
-    end = time()
+    # on CUDA, batches arrive on the GPU via a side copy stream so the
+    # H2D transfer of the next batch overlaps with this batch's compute
+    batches = DataPrefetcher(dataloader) if USE_CUDA else dataloader
+    n_batches = len(dataloader)
 
     if mode == "Train":
         model.train()
+        stats = _train_loop(
+            batches, n_batches, model, criterion, optimizer, scaler, graphed,
+            graph_cache,
+        )
     elif mode == "Test":
         model.eval()
+        stats = _test_loop(batches, n_batches, model, criterion)
     else:
         assert mode in ("Train", "Test"), f"Unsupported mode {mode}"
+    return (stats.avg_loss, stats.avg_top1)
+
+
+def _log_progress(mode, batch_idx, n_batches, data_time, batch_time, stats):
+    stats.sync()
+    logging.info(
+        "%s (%d/%d) Data: %.3fs | Batch: %.3fs | Loss: %.4f | top1: %.4f | top5: %.4f",
+        mode,
+        batch_idx + 1,
+        n_batches,
+        data_time.avg,
+        batch_time.avg,
+        stats.avg_loss,
+        stats.avg_top1,
+        stats.avg_top5,
+    )
+
+
+def _cuda_timing_events():
+    """Paired CUDA events for measuring actual GPU step time; host-side
+    timestamps never see GPU completion because nothing synchronizes.
 
-    bar = Bar(mode, max=len(dataloader))
-    for batch_idx, (inputs, targets) in enumerate(dataloader):
+    Reading the events back forces a host-GPU sync, so they are only
+    handed out when the DEBUG lines that report them will actually be
+    emitted — otherwise the sampled syncs cost time for nothing.
+    """
+    if not USE_CUDA or not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return None, None
+    return (
+        torch.cuda.Event(enable_timing=True),
+        torch.cuda.Event(enable_timing=True),
+    )
+
+
+def _train_loop(
+    batches, n_batches, model, criterion, optimizer, scaler, graphed, graph_cache=None
+):
+    batch_time = AverageMeter("Batch Time")
+    data_time = AverageMeter("Data Time")
+    stats = EpochStats()
+    ev_start, ev_end = _cuda_timing_events()
+    # ~50 progress lines per epoch; per-batch terminal writes sync
+    # stdout and cost real time on short steps
+    log_every = max(1, n_batches // 50)
+    end = monotonic_ns()
+
+    # one-launch-per-iter replay of the captured train step (opt-in);
+    # the cache carries the graph and static buffers across epochs
+    graphed = graphed and USE_CUDA
+    if graph_cache is None:
+        graph_cache = {}
+    graph = graph_cache.get("graph")
+    static = graph_cache.get("static")
+
+    for batch_idx, (inputs, targets) in enumerate(batches):
         # measure data loading time
-        data_time.update(time() - end)
-        if USE_CUDA:
-            inputs, targets = inputs.cuda(), targets.cuda()
+        data_time.update((monotonic_ns() - end) * 1e-9)
+        inputs = batch_transform(inputs, train=True)
+        time_gpu = ev_start is not None and batch_idx % 50 == 0
+        if time_gpu:
+            ev_start.record()
+
+        if graphed and graph is None:
+            graph, static = capture_train_graph(
+                model, criterion, optimizer, scaler, inputs, targets
+            )
+            graph_cache["graph"], graph_cache["static"] = graph, static
+
+        replayed = graph is not None and inputs.size(0) == static["inputs"].size(0)
+        if replayed:
+            static["inputs"].copy_(inputs)
+            static["targets"].copy_(targets)
+            graph.replay()
+            outputs, loss = static["outputs"], static["loss"]
+            # backward already ran inside the graph; step on the host
+            # and zero in place so the static grad buffers survive
+            scaler.step(optimizer)
+            scaler.update()
+            optimizer.zero_grad(set_to_none=False)
+        else:  # eager path; also covers a short final batch
+            with torch.cuda.amp.autocast(enabled=USE_CUDA):
+                outputs = model(inputs)
+                loss = criterion(outputs, targets)
+            # set_to_none skips the parameter-sized memset every step —
+            # but once a graph is captured the grads are its static
+            # buffers and must be zeroed in place, never freed
+            optimizer.zero_grad(set_to_none=(graph is None))
+            scaler.scale(loss / inputs.size(0)).backward()
+            scaler.step(optimizer)
+            scaler.update()
+
+        if time_gpu:
+            ev_end.record()
+            ev_end.synchronize()
+            logging.debug("GPU step time: %.3f ms", ev_start.elapsed_time(ev_end))
+
+        stats.accumulate(outputs, targets, loss, inputs.size(0))
 
-        # compute output
-        outputs = model(inputs)
-        loss = criterion(outputs, targets)
+        # measure elapsed time
+        now = monotonic_ns()
+        batch_time.update((now - end) * 1e-9)
+        end = now
 
-        # measure accuracy and record loss
-        # pylint: disable=unbalanced-tuple-unpacking
-        prec1, prec5 = calculate_accuracy(outputs.data, targets.data, topk=(1, 5))
-        losses.update(loss.data.item(), inputs.size(0))
-        top1.update(prec1.item(), inputs.size(0))
-        top5.update(prec5.item(), inputs.size(0))
+        if batch_idx % log_every == 0 or batch_idx + 1 == n_batches:
+            _log_progress("Train", batch_idx, n_batches, data_time, batch_time, stats)
+    return stats
 
-        if mode == "Train":
-            optimizer.zero_grad()
-            loss.backward()
-            optimizer.step()
+
+def _test_loop(batches, n_batches, model, criterion):
+    batch_time = AverageMeter("Batch Time")
+    data_time = AverageMeter("Data Time")
+    stats = EpochStats()
+    ev_start, ev_end = _cuda_timing_events()
+    log_every = max(1, n_batches // 50)
+    end = monotonic_ns()
+
+    for batch_idx, (inputs, targets) in enumerate(batches):
+        # measure data loading time
+        data_time.update((monotonic_ns() - end) * 1e-9)
+        inputs = batch_transform(inputs, train=False)
+        time_gpu = ev_start is not None and batch_idx % 50 == 0
+        if time_gpu:
+            ev_start.record()
+
+        with torch.cuda.amp.autocast(enabled=USE_CUDA):
+            outputs = model(inputs)
+            loss = criterion(outputs, targets)
+
+        if time_gpu:
+            ev_end.record()
+            ev_end.synchronize()
+            logging.debug("GPU step time: %.3f ms", ev_start.elapsed_time(ev_end))
+
+        stats.accumulate(outputs, targets, loss, inputs.size(0))
 
         # measure elapsed time
-        batch_time.update(time() - end)
-        end = time()
-
-        # plot progress
-        bar.suffix = "({batch}/{size}) Data: {data:.3f}s | Batch: {bt:.3f}s | Total: {total:} | ETA: {eta:} | Loss: {loss:.4f} | top1: {top1: .4f} | top5: {top5: .4f}".format(
-            batch=batch_idx + 1,
-            size=len(dataloader),
-            data=data_time.avg,
-            bt=batch_time.avg,
-            total=bar.elapsed_td,
-            eta=bar.eta_td,
-            loss=losses.avg,
-            top1=top1.avg,
-            top5=top5.avg,
-        )
-        bar.next()
-    bar.finish()
-    return (losses.avg, top1.avg)
+        now = monotonic_ns()
+        batch_time.update((now - end) * 1e-9)
+        end = now
+
+        if batch_idx % log_every == 0 or batch_idx + 1 == n_batches:
+            _log_progress("Test", batch_idx, n_batches, data_time, batch_time, stats)
+    return stats
 
 
 def update_learning_rate(lr, schedule, gamma, optimizer, epoch):
@@ -370,11 +710,49 @@ def update_learning_rate(lr, schedule, gamma, optimizer, epoch):
     return lr
 
 
+def unwrapped_state_dict(model):
+    """Return the state dict of the bare module underneath any wrappers.
+
+    DistributedDataParallel prefixes keys with ``module.`` and
+    torch.compile with ``_orig_mod.``, so the on-disk key format would
+    otherwise depend on which runtime flags produced the checkpoint.
+    Peeling the wrappers first keeps checkpoints loadable straight into
+    ``initialize_model`` output regardless of how training was run.
+    """
+    while True:
+        if isinstance(model, torch.nn.parallel.DistributedDataParallel):
+            model = model.module
+        elif hasattr(model, "_orig_mod"):
+            model = model._orig_mod
+        else:
+            return model.state_dict()
+
+
+def _atomic_save(obj, filepath):
+    # temp file + os.replace so a crash mid-write cannot leave a
+    # truncated checkpoint behind
+    tmppath = filepath + ".tmp"
+    torch.save(obj, tmppath, _use_new_zipfile_serialization=True, pickle_protocol=4)
+    os.replace(tmppath, filepath)
+
+
 def save_checkpoint(
-    state, is_best, checkpoint="checkpoint", filename="checkpoint.pth.tar"
+    state, is_best, epoch, checkpoint="checkpoint", filename="checkpoint.pth.tar"
 ):
+    """Persist training state, throttled to best epochs and every 10th.
+
+    The optimizer state (momentum buffers rival the weights in size)
+    goes to its own file so the weights checkpoint stays small; writing
+    both unconditionally every epoch burned tens of GB of disk bandwidth
+    over a full schedule.
+    """
+    if not (is_best or epoch % 10 == 0):
+        return
+    optimizer_state = state.pop("optimizer", None)
     filepath = os.path.join(checkpoint, filename)
-    torch.save(state, filepath)
+    _atomic_save(state, filepath)
+    if optimizer_state is not None:
+        _atomic_save(optimizer_state, os.path.join(checkpoint, "optimizer.pth.tar"))
     if is_best:
         shutil.copyfile(filepath, os.path.join(checkpoint, "model_best.pth.tar"))
 
@@ -426,15 +804,6 @@ def parse_arguments():
         type=str.lower,
         choices=("cifar10", "cifar100"),
     )
-    avail_cpus = min(4, len(os.sched_getaffinity(0)))
-    d_op.add_argument(
-        "-w",
-        "--workers",
-        default=avail_cpus,
-        type=int,
-        metavar="N",
-        help=f"number of data-loader workers (default: {avail_cpus})",
-    )
 
     # Architecture Options
     a_op = parser.add_argument_group("Architectures")
@@ -566,6 +935,12 @@ def parse_arguments():
         metavar="M",
         help=f"momentum (default: {_momentum})",
     )
+    o_op.add_argument(
+        "--cuda-graph",
+        action="store_true",
+        help="capture the train step into a replayable CUDA graph "
+        "(disables torch.compile)",
+    )
     _wd = 5e-4
     o_op.add_argument(
         "--weight-decay",
@@ -1,3 +1,4 @@
 from .average_meter import AverageMeter
 from .eval import calculate_accuracy
+from .prefetcher import DataPrefetcher
 from .scribe import Scribe
@@ -1,27 +1,28 @@
 
 class AverageMeter(object):
     """
-    Computes and stores the average and current value
+    Computes and stores the running average of a value
     https://github.com/pytorch/examples/blob/5b1f45057dc14a5e2132b45233c258a1dc2a0aab/imagenet/main.py#L351
+
+    Slotted and minimal: it is updated several times per batch on the
+    training hot path, so attribute access stays as cheap as possible.
     """
 
-    def __init__(self, name, fmt=':f'):
+    __slots__ = ('name', 'sum', 'count', 'avg')
+
+    def __init__(self, name):
         self.name = name
-        self.fmt = fmt
         self.reset()
 
     def reset(self):
-        self.val = 0
-        self.avg = 0
-        self.sum = 0
+        self.sum = 0.0
         self.count = 0
+        self.avg = 0.0
 
     def update(self, val, n=1):
-        self.val = val
         self.sum += val * n
         self.count += n
         self.avg = self.sum / self.count
 
     def __str__(self):
-        fmtstr = '{name} {val' + self.fmt + '} ({avg' + self.fmt + '})'
-        return fmtstr.format(**self.__dict__)
+        return '{0} {1:f}'.format(self.name, self.avg)
@@ -0,0 +1,49 @@
+import torch
+
+
+class DataPrefetcher(object):
+    """Iterate a DataLoader while copying batches to the GPU on a side stream.
+
+    The host-to-device copy of batch N+1 is issued on a dedicated CUDA
+    stream while batch N is still being computed on the default stream, so
+    the DMA engine runs concurrently with SM compute instead of
+    serializing with it. Requires the DataLoader to produce pinned-memory
+    tensors for the copies to be truly asynchronous.
+    """
+
+    def __init__(self, dataloader, stream=None):
+        self.dataloader = dataloader
+        self.stream = stream if stream is not None else torch.cuda.Stream()
+        self.iterator = None
+        self.next_inputs = None
+        self.next_targets = None
+
+    def __len__(self):
+        return len(self.dataloader)
+
+    def __iter__(self):
+        self.iterator = iter(self.dataloader)
+        self.preload()
+        return self
+
+    def __next__(self):
+        if self.next_inputs is None:
+            raise StopIteration
+        torch.cuda.current_stream().wait_stream(self.stream)
+        inputs, targets = self.next_inputs, self.next_targets
+        # prevent the caching allocator from handing this memory back to
+        # the copy stream before the default stream is done with it
+        inputs.record_stream(torch.cuda.current_stream())
+        targets.record_stream(torch.cuda.current_stream())
+        self.preload()
+        return inputs, targets
+
+    def preload(self):
+        try:
+            inputs, targets = next(self.iterator)
+        except StopIteration:
+            self.next_inputs, self.next_targets = None, None
+            return
+        with torch.cuda.stream(self.stream):
+            self.next_inputs = inputs.cuda(non_blocking=True)
+            self.next_targets = targets.cuda(non_blocking=True)
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
 
@@ -52,6 +51,10 @@ class Scribe(object):
         self.file.flush()
 
     def plot(self, plot_title=None, names=None, xlabel=None, ylabel=None):
+        # matplotlib is only needed once training finishes; importing it
+        # lazily keeps it off the training startup path
+        import matplotlib.pyplot as plt
+
         names = self.names if names is None else names
         numbers = self.numbers
         for name in names:
@@ -72,6 +75,8 @@ class Scribe(object):
 
     @staticmethod
     def savefig(fname, dpi=None):
+        import matplotlib.pyplot as plt
+
         if dpi is None:
             dpi = 150
         plt.savefig(fname, dpi=dpi)